@@ -1,61 +1,285 @@
+import os
+
 import streamlit as st
+import numpy as np
 import pandas as pd
-import plotly.express as px
 
-# Load the dataset
-@st.cache_data
-def load_data():
-    data = pd.read_csv('renewable_dataset.csv')
+# Load the dataset, persisting the cached frame to disk so it survives restarts.
+# The CSV's modification time is part of the cache key so an edited CSV is reloaded;
+# the cached helpers below take the same token since their `_data` argument is not hashed.
+@st.cache_data(persist='disk', max_entries=1, show_spinner=False)
+def load_data(csv_mtime):
+    # Parse the CSV once into a typed Parquet copy and read that on later starts
+    path = 'renewable_dataset.parquet'
+    if not os.path.exists(path) or os.path.getmtime(path) < csv_mtime:
+        data = pd.read_csv('renewable_dataset.csv',
+                           dtype={
+                               'Region': 'category',
+                               'Country': 'category',
+                               'Energy_Source': 'category',
+                               'Income_Level': 'category',
+                               'Urban_Rural': 'category',
+                               'Subsidy_Received': 'category',
+                               'Year': 'int16',
+                               'Adoption_Year': 'int16',
+                               'Household_Size': 'int8',
+                               'Monthly_Usage_kWh': 'float32',
+                               'Cost_Savings_USD': 'float32'
+                           })
+        data.to_parquet(path, engine='pyarrow')
+    # Sort the data by Year
+    data = pd.read_parquet(path, engine='pyarrow').sort_values('Year', kind='stable', ignore_index=True)
     return data
 
+# Coarsen years into buckets of `step` years counted from the earliest year, labelled by the first year of each bucket
+def bucket_year(years, step):
+    lo = years.min()
+    return lo + (years - lo) // step * step
+
+# Mean of `values` per (year, categorical key) pair using flat bincounts over the integer codes
+def grouped_mean(years, keys, values):
+    # Missing categories have code -1 and missing values would poison the sums; drop both
+    # the way groupby(observed=True).mean() does
+    key_codes = keys.cat.codes.to_numpy()
+    valid = (key_codes >= 0) & ~np.isnan(values.to_numpy())
+    year_labels, year_codes = np.unique(years.to_numpy()[valid], return_inverse=True)
+    n_keys = len(keys.cat.categories)
+    idx = year_codes * n_keys + key_codes[valid]
+    sums = np.bincount(idx, weights=values.to_numpy()[valid], minlength=len(year_labels) * n_keys)
+    counts = np.bincount(idx, minlength=len(year_labels) * n_keys)
+
+    # Keep only observed pairs, matching groupby(observed=True)
+    observed = np.flatnonzero(counts)
+    return pd.DataFrame({
+        years.name: year_labels[observed // n_keys],
+        keys.name: pd.Categorical.from_codes(observed % n_keys, dtype=keys.dtype),
+        values.name: sums[observed] / counts[observed]
+    })
+
+# Average monthly usage per year bucket and energy source
+@st.cache_data
+def compute_avg_usage(_data, csv_mtime, step=1):
+    avg_usage = grouped_mean(bucket_year(_data['Year'], step), _data['Energy_Source'], _data['Monthly_Usage_kWh'])
+    return avg_usage, float(avg_usage['Monthly_Usage_kWh'].max()) * 1.1
+
+# Average cost savings per year bucket and income level
+@st.cache_data
+def compute_avg_savings(_data, csv_mtime, step=1):
+    avg_savings = grouped_mean(bucket_year(_data['Year'], step), _data['Income_Level'], _data['Cost_Savings_USD'])
+    return avg_savings, float(avg_savings['Cost_Savings_USD'].max()) * 1.1
+
+# Cumulative adoption counts, expanded so each animation frame shows the years up to it
+@st.cache_data
+def compute_expanded_adoption(_data, csv_mtime, step=1):
+    # Create a DataFrame for adoption counts
+    adoption_years = _data['Adoption_Year'].value_counts(sort=False).rename_axis('Year').reset_index(name='Count')
+
+    # Create a cumulative count for the years
+    adoption_years = adoption_years.sort_values('Year', ignore_index=True)
+    adoption_years['Cumulative_Count'] = adoption_years['Count'].cumsum()
+
+    # Prepare data for animation showing years up to the animated year
+    all_years = np.unique(adoption_years['Year'].to_numpy())
+
+    # Keep every `step`-th animation frame, counting back so the last year is always shown
+    all_years = all_years[::-step][::-1]
+
+    # Gather the (year, frame) pairs straight into typed arrays instead of filtering a full cross join,
+    # keeping only the columns the chart plots
+    years = adoption_years['Year'].to_numpy()
+    year_idx, frame_idx = np.nonzero(years[:, None] <= all_years[None, :])
+    expanded_adoption_data = pd.DataFrame({
+        'Year': years[year_idx].astype('int32'),
+        'Cumulative_Count': adoption_years['Cumulative_Count'].to_numpy()[year_idx],
+        'Animation_Year': all_years[frame_idx].astype('int32')
+    })
+    # The running total peaks at the last adoption year, so no scan of the expanded frame is needed
+    return expanded_adoption_data, float(adoption_years['Cumulative_Count'].iat[-1]) * 1.1
+
+# Per-country averages and modes of the map variables, indexed by year
+@st.cache_data
+def precompute_maps(_data, csv_mtime):
+    num = _data.groupby(['Year', 'Country'], observed=True)[['Monthly_Usage_kWh', 'Cost_Savings_USD', 'Household_Size']].mean()
+    modes = []
+    for variable in ['Income_Level', 'Urban_Rural']:
+        # Most frequent value per country, ties broken by the first value like Series.mode()
+        counts = _data.groupby(['Year', 'Country', variable], observed=True).size().reset_index(name='n')
+        counts = counts.sort_values(['Year', 'Country', 'n', variable], ascending=[True, True, False, True])
+        modes.append(counts.drop_duplicates(['Year', 'Country']).set_index(['Year', 'Country'])[variable])
+    mode = pd.concat(modes, axis=1)
+
+    # One Country-indexed table per year so the map tab is a dict lookup
+    table = num.join(mode)
+    return {year: group.droplevel('Year') for year, group in table.groupby(level='Year', sort=False)}
+
+# Animated bar chart for Monthly Usage by Energy Source
+@st.cache_resource
+def build_usage_fig(avg_usage, ymax):
+    import plotly.express as px
+
+    fig_usage = px.bar(avg_usage, 
+                        x='Energy_Source', 
+                        y='Monthly_Usage_kWh',
+                        animation_frame='Year',
+                        range_y=[0, ymax],
+                        title='Average Monthly Usage by Energy Source Over Years',
+                        labels={'Monthly_Usage_kWh': 'Average Monthly Usage (kWh)'},
+                        color_discrete_sequence=['rgb(158,202,225)'],
+                        text_auto='.2f'
+                    )
+    fig_usage.update(
+        layout=dict(
+            margin=dict(l=20, r=20, t=40, b=20), 
+            transition=dict(duration=1500), 
+            yaxis=dict(title='Average Monthly Usage (kWh)'),
+            xaxis=dict(title='Energy Source'),
+            coloraxis=dict(showscale=False)
+        ),
+        data=[dict(marker=dict(line=dict(color='rgb(8,48,107)', width=1.5)), textposition='outside')]
+    )
+    return fig_usage
+
+# Animated bar chart for Cost Savings by Income Level
+@st.cache_resource
+def build_savings_fig(avg_savings, ymax):
+    import plotly.express as px
+
+    fig_savings = px.bar(avg_savings, 
+                          x='Income_Level', 
+                          y='Cost_Savings_USD',
+                          animation_frame='Year',
+                          range_y=[0, ymax],
+                          title='Average Cost Savings by Income Level Over Years',
+                          labels={'Cost_Savings_USD': 'Average Cost Savings (USD)'},
+                          color_discrete_sequence=['rgb(123,204,196)'],
+                          text_auto='.2f'
+                      )
+    fig_savings.update(
+        layout=dict(
+            margin=dict(l=20, r=20, t=40, b=20), 
+            transition=dict(duration=1500), 
+            yaxis=dict(title='Average Cost Savings (USD)'),
+            xaxis=dict(title='Income Level'),
+            coloraxis=dict(showscale=False)
+        ),
+        data=[dict(marker=dict(line=dict(color='rgb(44,127,184)', width=1.5)), textposition='outside')]
+    )
+    return fig_savings
+
+# Animated bar chart for cumulative adoption by year
+@st.cache_resource
+def build_adoption_fig(expanded_adoption_data, ymax):
+    import plotly.express as px
+
+    fig_adoption = px.bar(expanded_adoption_data, 
+                           x='Year', 
+                           y='Cumulative_Count',
+                           animation_frame='Animation_Year',
+                           title='Number of Households Adopting Renewable Energy by Year',
+                           labels={'Cumulative_Count': 'Cumulative Number of Households'},
+                           range_y=[0, ymax],
+                           color_discrete_sequence=['rgb(190,174,212)'],
+                           text_auto=True
+                       )
+    fig_adoption.update(
+        layout=dict(
+            yaxis=dict(title='Cumulative Number of Households'), 
+            xaxis=dict(title='Year'),
+            margin=dict(l=20, r=20, t=40, b=20), 
+            transition=dict(duration=1500)
+        ),
+        data=[dict(marker=dict(line=dict(color='rgb(128,0,128)', width=1.5)), textposition='outside')]
+    )
+    return fig_adoption
+
+# Base choropleth with the map styling; the trace data is swapped in on each selection
+def base_choropleth():
+    import plotly.graph_objects as go
+
+    fig_map = go.Figure(go.Choropleth(locationmode='country names', marker_line_color='white'))
+    fig_map.update_layout(
+        margin=dict(l=20, r=20, t=40, b=20),
+        geo=dict(
+            showframe=False, 
+            showcoastlines=True, 
+            projection_type='equirectangular',
+            coastlinecolor="Gray",
+            showland=True,
+            landcolor="LightGray"
+        )
+    )
+    return fig_map
+
+# Point the choropleth trace at the selected variable by country
+def update_map_fig(fig_map, country_avg, selected_variable, title):
+    from plotly.colors import qualitative
+
+    label = selected_variable.replace('_', ' ').title()
+    values = country_avg[selected_variable]
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        # Categorical modes are drawn as their codes with one flat colour band per category
+        categories = list(values.cat.categories)
+        colorscale = []
+        for i in range(len(categories)):
+            color = qualitative.Plotly[i % len(qualitative.Plotly)]
+            colorscale += [[i / len(categories), color], [(i + 1) / len(categories), color]]
+        trace = dict(z=values.cat.codes, text=values.astype(str), colorscale=colorscale,
+                     zmin=-0.5, zmax=len(categories) - 0.5,
+                     colorbar=dict(title=label, tickvals=list(range(len(categories))), ticktext=categories),
+                     hovertemplate='%{location}<br>%{text}<extra></extra>')
+    else:
+        trace = dict(z=values, text=None, colorscale='Plasma', zmin=None, zmax=None,
+                     colorbar=dict(title=label, tickvals=None, ticktext=None),
+                     hovertemplate='%{location}<br>%{z:.2f}<extra></extra>')
+    fig_map.data[0].update(locations=country_avg['Country'], **trace)
+    fig_map.update_layout(title_text=title)
+    return fig_map
+
+# Streamlit drops the state of widgets that are not rendered, so each widget uses a
+# "_"-prefixed key and its value is copied to a persistent key that survives view switches
+def load_widget(key, options):
+    if st.session_state.get(key) not in options:
+        st.session_state[key] = options[0]
+    st.session_state['_' + key] = st.session_state[key]
+
+def store_widget(key):
+    st.session_state[key] = st.session_state['_' + key]
+
 # Main function to run the Streamlit app
 def main():
     st.title("Renewable Energy Household Dashboard")
 
     # Load data
-    data = load_data()
-
-    # Sort the data by Year
-    data = data.sort_values(by='Year')
+    csv_mtime = os.path.getmtime('renewable_dataset.csv')
+    data = load_data(csv_mtime)
 
-    # Create tabs
-    tab1, tab2, tab3 = st.tabs(["Data Overview", "Bar Charts", "Map with Filter"])
+    # Create tabs. st.tabs runs every tab body on each rerun, so a radio picks the one view to build
+    tab = st.radio("View", ["Data Overview", "Bar Charts", "Map with Filter"],
+                   horizontal=True, label_visibility="collapsed")
 
     # Data Overview Tab
-    with tab1:
+    if tab == "Data Overview":
         st.subheader("Dataset Overview")
         st.dataframe(data)
 
     # Bar Charts Tab
-    with tab2:
+    elif tab == "Bar Charts":
         st.subheader("Bar Charts")
 
+        # Animation resolution for the bar charts
+        load_widget('step', [1, 2, 3])
+        step = st.sidebar.slider("Animation Year Step", min_value=1, max_value=3, key='_step',
+                                 on_change=store_widget, args=('step',),
+                                 help="Average the usage and savings charts over buckets of this many years, "
+                                      "and show every this-many-th year in the adoption chart.")
+
         # Monthly Usage by Energy Source
         st.subheader("Monthly Usage by Energy Source")
         st.write("This chart shows the household's average monthly energy usage (in kWh) for different renewable energy sources.")
 
         # Create animated bar chart for Monthly Usage by Energy Source
-        avg_usage = data.groupby(['Year', 'Energy_Source'])['Monthly_Usage_kWh'].mean().reset_index()
-        fig_usage = px.bar(avg_usage, 
-                            x='Energy_Source', 
-                            y='Monthly_Usage_kWh',
-                            animation_frame='Year',
-                            range_y=[0, avg_usage['Monthly_Usage_kWh'].max() * 1.1],
-                            title='Average Monthly Usage by Energy Source Over Years',
-                            labels={'Monthly_Usage_kWh': 'Average Monthly Usage (kWh)'}
-                        )
-        fig_usage.update_layout(
-            margin=dict(l=20, r=20, t=40, b=20), 
-            transition_duration=1500, 
-            yaxis_title='Average Monthly Usage (kWh)',
-            xaxis_title='Energy Source',
-            coloraxis_showscale=False
-        )
-        fig_usage.update_traces(marker_color='rgb(158,202,225)',
-                                marker_line_color='rgb(8,48,107)',
-                                marker_line_width=1.5, 
-                                texttemplate='%{y:.2f}',
-                                textposition='outside')
+        avg_usage, usage_ymax = compute_avg_usage(data, csv_mtime, step)
+        fig_usage = build_usage_fig(avg_usage, usage_ymax)
         st.plotly_chart(fig_usage, use_container_width=True, height=450)
 
         # Cost Savings by Income Level
@@ -63,125 +287,51 @@ def main():
         st.write("This chart illustrates the average monthly cost savings (in USD) for households based on their income level.")
 
         # Create animated bar chart for Cost Savings by Income Level
-        avg_savings = data.groupby(['Year', 'Income_Level'])['Cost_Savings_USD'].mean().reset_index()
-        fig_savings = px.bar(avg_savings, 
-                              x='Income_Level', 
-                              y='Cost_Savings_USD',
-                              animation_frame='Year',
-                              range_y=[0, avg_savings['Cost_Savings_USD'].max() * 1.1],
-                              title='Average Cost Savings by Income Level Over Years',
-                              labels={'Cost_Savings_USD': 'Average Cost Savings (USD)'}
-                          )
-        fig_savings.update_layout(
-            margin=dict(l=20, r=20, t=40, b=20), 
-            transition_duration=1500, 
-            yaxis_title='Average Cost Savings (USD)',
-            xaxis_title='Income Level',
-            coloraxis_showscale=False
-        )
-        fig_savings.update_traces(marker_color='rgb(123,204,196)',
-                                  marker_line_color='rgb(44,127,184)',
-                                  marker_line_width=1.5, 
-                                  texttemplate='%{y:.2f}',
-                                  textposition='outside')
+        avg_savings, savings_ymax = compute_avg_savings(data, csv_mtime, step)
+        fig_savings = build_savings_fig(avg_savings, savings_ymax)
         st.plotly_chart(fig_savings, use_container_width=True, height=450)
 
         # Adoption Year Distribution
         st.subheader("Adoption Year Distribution")
         st.write("This chart displays the number of households that adopted renewable energy each year.")
 
-        # Create a DataFrame for adoption counts
-        adoption_years = data['Adoption_Year'].value_counts().reset_index()
-        adoption_years.columns = ['Year', 'Count']
-
-        # Create a cumulative count for the years
-        adoption_years = adoption_years.sort_values('Year')
-        adoption_years['Cumulative_Count'] = adoption_years['Count'].cumsum()
-
-        # Prepare data for animation showing years up to the animated year
-        all_years = sorted(adoption_years['Year'].unique())
-        expanded_data = []
-
-        for year in all_years:
-            temp_data = adoption_years[adoption_years['Year'] <= year].copy()
-            temp_data['Animation_Year'] = year
-            expanded_data.append(temp_data)
-
-        expanded_adoption_data = pd.concat(expanded_data)
-        expanded_adoption_data['Year'] = expanded_adoption_data['Year'].astype(int)
-        expanded_adoption_data['Animation_Year'] = expanded_adoption_data['Animation_Year'].astype(int)
+        # Cumulative adoption counts per animation frame
+        expanded_adoption_data, adoption_ymax = compute_expanded_adoption(data, csv_mtime, step)
 
         # Create the animated bar chart
-        fig_adoption = px.bar(expanded_adoption_data, 
-                               x='Year', 
-                               y='Cumulative_Count',
-                               animation_frame='Animation_Year',
-                               title='Number of Households Adopting Renewable Energy by Year',
-                               labels={'Cumulative_Count': 'Cumulative Number of Households'},
-                               range_y=[0, expanded_adoption_data['Cumulative_Count'].max() * 1.1]
-                           )
-
-        fig_adoption.update_traces(
-            texttemplate='%{y}', 
-            textposition='outside',
-            marker_color='rgb(190,174,212)',
-            marker_line_color='rgb(128,0,128)',
-            marker_line_width=1.5
-        )
-        fig_adoption.update_layout(
-            yaxis_title='Cumulative Number of Households', 
-            xaxis_title='Year',
-            margin=dict(l=20, r=20, t=40, b=20), 
-            transition_duration=1500
-        )
+        fig_adoption = build_adoption_fig(expanded_adoption_data, adoption_ymax)
         st.plotly_chart(fig_adoption, use_container_width=True, height=450)
 
     # Map with Filter Tab
-    with tab3:
+    elif tab == "Map with Filter":
         st.subheader("Map with Filter")
 
         # Filters
         st.subheader("Filters")
 
         # Filter by Year
-        years = data['Year'].unique()
-        selected_year = st.selectbox("Select Year", years)
+        years = np.unique(data['Year'].to_numpy())
+        load_widget('selected_year', list(years))
+        selected_year = st.selectbox("Select Year", years, key='_selected_year',
+                                     on_change=store_widget, args=('selected_year',))
 
         # Filter by Variable
         variables = ['Monthly_Usage_kWh', 'Cost_Savings_USD', 'Household_Size', 'Income_Level', 'Urban_Rural'] 
-        selected_variable = st.selectbox("Select Variable", variables)
-
-        # Filter the data based on selections
-        filtered_data = data[data['Year'] == selected_year]
+        load_widget('selected_variable', variables)
+        selected_variable = st.selectbox("Select Variable", variables, key='_selected_variable',
+                                         on_change=store_widget, args=('selected_variable',))
 
         # Visualization: Average or Mode by Selected Variable
         if selected_variable in ['Monthly_Usage_kWh', 'Cost_Savings_USD', 'Household_Size']:
             title = f"Average {selected_variable} by Country"
-            country_avg = filtered_data.groupby('Country')[selected_variable].mean().reset_index()
         else:
             title = f"Mode of {selected_variable} by Country"
-            country_avg = filtered_data.groupby('Country')[selected_variable].agg(lambda x: x.mode()[0]).reset_index()
-
-        # Create an interactive map for the filtered data
-        fig_map = px.choropleth(country_avg, 
-                                locations='Country', 
-                                locationmode='country names',
-                                color=selected_variable,
-                                title=title,
-                                labels={selected_variable: selected_variable.replace('_', ' ').title()}
-                                )
-        fig_map.update_layout(
-            margin=dict(l=20, r=20, t=40, b=20),
-            geo=dict(
-                showframe=False, 
-                showcoastlines=True, 
-                projection_type='equirectangular',
-                coastlinecolor="Gray",
-                showland=True,
-                landcolor="LightGray"
-            )
-        )
-        fig_map.update_traces(marker_line_color='white', hovertemplate='%{location}<br>%{z:.2f}')
+        country_avg = precompute_maps(data, csv_mtime)[selected_year][selected_variable].reset_index()
+
+        # Create an interactive map for the filtered data, reusing this session's figure
+        if 'map_fig' not in st.session_state:
+            st.session_state['map_fig'] = base_choropleth()
+        fig_map = update_map_fig(st.session_state['map_fig'], country_avg, selected_variable, title)
         st.plotly_chart(fig_map, use_container_width=True)
 
 if __name__ == "__main__":